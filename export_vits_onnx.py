@@ -0,0 +1,22 @@
+"""One-time export of the VCTK VITS model to ONNX for tts_api_server.py.
+
+Run once per model download; the server picks the file up from TTS_ONNX_MODEL
+(default: vits.onnx) on CPU-only hosts.
+"""
+import os
+import sys
+from TTS.utils.synthesizer import Synthesizer
+from TTS.utils.manage import ModelManager
+
+if __name__ == "__main__":
+    output_path = sys.argv[1] if len(sys.argv) > 1 else os.environ.get("TTS_ONNX_MODEL", "vits.onnx")
+    model_manager = ModelManager()
+    model_path_vctk, config_path_vctk, _ = model_manager.download_model("tts_models/en/vctk/vits")
+    # Export from the fp32 eager model; the server only quantizes when no ONNX file is present
+    synthesizer_vctk = Synthesizer(
+        tts_checkpoint=model_path_vctk,
+        tts_config_path=config_path_vctk,
+        use_cuda=False
+    )
+    synthesizer_vctk.tts_model.export_onnx(output_path=output_path, verbose=False)
+    print(f"Exported VCTK model to {output_path}")
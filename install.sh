@@ -1,6 +1,6 @@
 python3.10 -m venv venv
 source venv/bin/activate
-pip install fastapi uvicorn transformers scipy TTS
+pip install fastapi uvicorn uvloop httptools orjson cachetools transformers scipy TTS
 pip freeze > requirements_api.txt
 pip install --upgrade pip
 pip install --upgrade "transformers>=4.31.0" scipy
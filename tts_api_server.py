@@ -1,31 +1,108 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse, ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+from pydantic import BaseModel, ConfigDict, ValidationError, field_validator
 import io
 from TTS.utils.synthesizer import Synthesizer
 from TTS.utils.manage import ModelManager
+from TTS.tts.utils.synthesis import trim_silence
 import uvicorn
 import os
+import torch
 import logging
+import logging.handlers
+import queue
 import traceback
+import threading
+import time
+import asyncio
+import concurrent.futures
+import struct
+import collections
+import hashlib
+import gzip
+from cachetools import LRUCache
+import numpy as np
 from datetime import datetime
 from typing import Optional
 from transformers.pipelines import pipeline
-import scipy
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('tts_server.log'),
-        logging.StreamHandler()
-    ]
-)
+
+# Configure logging - records are queued by the caller and written to the file and
+# console by a QueueListener thread, so request handlers never block on disk I/O.
+# The listener is started and stopped by the app's own startup/shutdown hooks.
+log_queue = queue.Queue(-1)
+log_listener = None
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="TTS API Server")
+def start_log_listener():
+    global log_listener
+    log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    log_file_handler = logging.FileHandler('tts_server.log')
+    log_file_handler.setFormatter(log_formatter)
+    log_stream_handler = logging.StreamHandler()
+    log_stream_handler.setFormatter(log_formatter)
+    log_listener = logging.handlers.QueueListener(log_queue, log_file_handler, log_stream_handler)
+    log_listener.start()
+    # force replaces any root handlers installed before this hook ran
+    logging.basicConfig(
+        level=logging.INFO,
+        handlers=[
+            logging.handlers.QueueHandler(log_queue)
+        ],
+        force=True
+    )
+
+class AudioPassthroughGZipMiddleware:
+    """Gzip single-body responses for clients that accept it, leaving audio/* untouched.
+
+    Starlette's GZipMiddleware has no content-type hook, and PCM audio doesn't compress,
+    so audio responses and streamed bodies are forwarded as they are.
+    """
+
+    def __init__(self, app, minimum_size=500, compresslevel=9):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_maybe_compressed(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if headers.get("content-type", "").startswith("audio/") or "content-encoding" in headers:
+                    await send(message)
+                else:
+                    # Hold the start message until the body shows whether compressing is worthwhile
+                    start_message = message
+                return
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+            pending_start, start_message = start_message, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                await send(pending_start)
+                await send(message)
+                return
+            body = gzip.compress(body, compresslevel=self.compresslevel)
+            headers = MutableHeaders(raw=list(pending_start["headers"]))
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            await send({**pending_start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_maybe_compressed)
+
+app = FastAPI(title="TTS API Server", default_response_class=ORJSONResponse)
 
 # Add CORS middleware
 app.add_middleware(
@@ -36,52 +113,513 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# Compress JSON responses (speaker list, error details); audio is passed through untouched
+app.add_middleware(AudioPassthroughGZipMiddleware, minimum_size=500)
+
+# Run VITS on the GPU when one is available, with fp16 autocast for the forward pass
+USE_CUDA = torch.cuda.is_available()
+
+# Uvicorn worker processes; every worker loads its own copy of the models. On a GPU one
+# worker owns the device (and its executor, batch coalescer and audio cache); on CPU half
+# the cores are split across workers. TTS_WORKERS overrides either default.
+DEFAULT_WORKERS = 1 if USE_CUDA else max(1, (os.cpu_count() or 1) // 2)
+WORKERS = int(os.environ.get("TTS_WORKERS", DEFAULT_WORKERS))
+
+# Synthesis runs on a single thread per worker so it never blocks the event loop;
+# torch's intra-op pool gets this worker's share of the cores instead
+torch.set_num_threads(max(1, (os.cpu_count() or 1) // WORKERS))
+EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts")
+# Bounds how many sentences can wait in the batch coalescer
+MAX_PENDING_SYNTHESIS = 16
+# Streams a worker renders at once; new requests get a 503 beyond it
+MAX_ACTIVE_STREAMS = int(os.environ.get("TTS_MAX_STREAMS", 8))
+
+# ONNX export of the VCTK model (see export_vits_onnx.py); used on CPU hosts when present
+VITS_ONNX_PATH = os.environ.get("TTS_ONNX_MODEL", "vits.onnx")
+use_onnx = False
+
 # Initialize TTS models
 synthesizer_vctk = None
 synthesizer_bark = None
 
-# Initialize VCTK model (primary model for podcast)
-try:
-    logger.info("Initializing VCTK model...")
-    model_manager = ModelManager()
-    model_name_vctk = "tts_models/en/vctk/vits"
-    model_path_vctk, config_path_vctk, model_item_vctk = model_manager.download_model(model_name_vctk)
-    vocoder_name_vctk = model_item_vctk.get("default_vocoder", None)
-    vocoder_path_vctk, vocoder_config_path_vctk, _ = (None, None, None)
-    if vocoder_name_vctk:
-        vocoder_path_vctk, vocoder_config_path_vctk, _ = model_manager.download_model(vocoder_name_vctk)
-    synthesizer_vctk = Synthesizer(
-        tts_checkpoint=model_path_vctk,
-        tts_config_path=config_path_vctk,
-        vocoder_checkpoint=vocoder_path_vctk,
-        vocoder_config=vocoder_config_path_vctk,
-        use_cuda=False
+# Speaker names, fixed once the model has loaded; filled in by load_vctk_model()
+SPEAKER_IDS = ()
+SPEAKER_SET = frozenset()
+DEFAULT_SPEAKER = None
+
+def quantize_linear_layers(model, name):
+    """Dynamically quantize a model's nn.Linear layers to int8 in place; returns how many were swapped."""
+    torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    num_quantized = sum(isinstance(m, torch.ao.nn.quantized.dynamic.Linear) for m in model.modules())
+    if num_quantized:
+        logger.info(f"Quantized {num_quantized} Linear layers of the {name} to int8.")
+    else:
+        # Coqui's VITS is built from Conv1d/ConvTranspose1d/Embedding layers, so this is the usual case
+        logger.info(f"The {name} has no Linear layers; int8 dynamic quantization left it unchanged.")
+    return num_quantized
+
+def load_vctk_model():
+    """Load the VCTK synthesizer and its inference backend into the module globals.
+
+    Called from the startup hook rather than at import, so only uvicorn worker
+    processes load a model - not the launcher running this file as __main__.
+    """
+    global synthesizer_vctk, use_onnx, SPEAKER_IDS, SPEAKER_SET, DEFAULT_SPEAKER
+
+    # Initialize VCTK model (primary model for podcast)
+    try:
+        logger.info("Initializing VCTK model...")
+        model_manager = ModelManager()
+        model_name_vctk = "tts_models/en/vctk/vits"
+        model_path_vctk, config_path_vctk, model_item_vctk = model_manager.download_model(model_name_vctk)
+        vocoder_name_vctk = model_item_vctk.get("default_vocoder", None)
+        vocoder_path_vctk, vocoder_config_path_vctk, _ = (None, None, None)
+        if vocoder_name_vctk:
+            vocoder_path_vctk, vocoder_config_path_vctk, _ = model_manager.download_model(vocoder_name_vctk)
+        synthesizer_vctk = Synthesizer(
+            tts_checkpoint=model_path_vctk,
+            tts_config_path=config_path_vctk,
+            vocoder_checkpoint=vocoder_path_vctk,
+            vocoder_config=vocoder_config_path_vctk,
+            use_cuda=USE_CUDA
+        )
+        if USE_CUDA and os.environ.get("TTS_TORCH_COMPILE", "1") != "0":
+            # synthesize_sentence calls inference() directly, so compile that rather than forward().
+            # Default mode, not "reduce-overhead": CUDA graphs record one graph per concrete shape,
+            # and token counts and predicted durations change with every sentence.
+            synthesizer_vctk.tts_model.inference = torch.compile(
+                synthesizer_vctk.tts_model.inference, fullgraph=False, dynamic=True
+            )
+            logger.info("Compiled VCTK model inference with torch.compile.")
+        # The ONNX export only covers end-to-end models conditioned on speaker ids
+        onnx_supported = synthesizer_vctk.vocoder_model is None and not synthesizer_vctk.tts_config.use_d_vector_file
+        if not USE_CUDA and onnx_supported and os.path.exists(VITS_ONNX_PATH):
+            import onnxruntime as ort
+            sess_options = ort.SessionOptions()
+            sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            sess_options.intra_op_num_threads = torch.get_num_threads()
+            # Kept on the model as onnx_sess, which synthesize_sentence runs directly
+            synthesizer_vctk.tts_model.onnx_sess = ort.InferenceSession(
+                VITS_ONNX_PATH, sess_options=sess_options, providers=["CPUExecutionProvider"]
+            )
+            use_onnx = True
+            logger.info(f"Loaded ONNX Runtime session for VCTK model from {VITS_ONNX_PATH}.")
+        elif not USE_CUDA:
+            # Dynamic int8 quantization only applies to nn.Linear, and quantized kernels are CPU-only
+            quantize_linear_layers(synthesizer_vctk.tts_model, "VCTK TTS model")
+            if synthesizer_vctk.vocoder_model is not None:
+                quantize_linear_layers(synthesizer_vctk.vocoder_model, "VCTK vocoder")
+        logger.info("VCTK model loaded successfully.")
+    except Exception as e:
+        logger.error(f"Failed to initialize VCTK model: {str(e)}")
+        logger.error(traceback.format_exc())
+        # Don't raise here - let the server start with just Bark if available
+
+    # Speaker names are fixed once the model has loaded, so resolve them a single time
+    speaker_manager_vctk = getattr(getattr(synthesizer_vctk, 'tts_model', None), 'speaker_manager', None)
+    SPEAKER_IDS = tuple(getattr(speaker_manager_vctk, 'name_to_id', None) or ())
+    SPEAKER_SET = frozenset(SPEAKER_IDS)
+    DEFAULT_SPEAKER = SPEAKER_IDS[0] if SPEAKER_IDS else None
+
+    # Bark model initialization disabled for now - will be fixed separately
+    logger.info("Bark model initialization disabled - focusing on VCTK for podcast")
+
+# Hugging Face Bark setup - loaded on first use of /api/tts/bark so workers that
+# never serve Bark don't pay for its ~4 GB of weights. Loading and generation run on
+# their own thread so the event loop (and VCTK streams) keep going meanwhile.
+BARK_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="bark")
+# After a failed load, requests skip Bark for this long before a reload is attempted
+BARK_RETRY_SECONDS = 300
+_bark = None
+_bark_failed_at = None
+_bark_lock = threading.Lock()
+
+def get_bark():
+    """Return the Bark pipeline, loading it once; after a failure, retry only once the cooldown has passed."""
+    global _bark, _bark_failed_at
+    with _bark_lock:
+        if _bark is None:
+            if _bark_failed_at is not None and time.monotonic() - _bark_failed_at < BARK_RETRY_SECONDS:
+                return None
+            try:
+                if USE_CUDA:
+                    _bark = pipeline("text-to-speech", "suno/bark", torch_dtype=torch.float16, device_map="auto")
+                else:
+                    _bark = pipeline("text-to-speech", "suno/bark")
+                _bark_failed_at = None
+            except Exception as e:
+                _bark_failed_at = time.monotonic()
+                logging.error(f"Failed to initialize Hugging Face Bark pipeline (retrying in {BARK_RETRY_SECONDS}s): {e}")
+        return _bark
+
+def bark_to_wav(text):
+    """Generate speech with Bark and return it as an in-memory WAV, or None if Bark is unavailable."""
+    bark_pipeline = get_bark()
+    if bark_pipeline is None:
+        return None
+    speech = bark_pipeline(text, forward_params={"do_sample": True})
+    wav_bytes = io.BytesIO()
+    write_wav_fast(wav_bytes, speech["sampling_rate"], speech["audio"])
+    wav_bytes.seek(0)
+    return wav_bytes
+
+# Speaker conditioning resolved once per speaker name and kept on the model device
+SPEAKER_CACHE = {}
+SPEAKER_CACHE_LOCK = threading.Lock()
+
+def get_speaker_aux(speaker_name):
+    """Return the cached aux_input entries that condition the VCTK model on a speaker."""
+    aux_input = SPEAKER_CACHE.get(speaker_name)
+    if aux_input is not None:
+        return aux_input
+    with SPEAKER_CACHE_LOCK:
+        aux_input = SPEAKER_CACHE.get(speaker_name)
+        if aux_input is None:
+            tts_model = synthesizer_vctk.tts_model
+            device = next(tts_model.parameters()).device
+            if synthesizer_vctk.tts_config.use_d_vector_file:
+                embedding = tts_model.speaker_manager.get_mean_embedding(speaker_name, num_samples=None, randomize=False)
+                aux_input = {"d_vectors": torch.tensor(embedding, dtype=torch.float32, device=device).unsqueeze(0)}
+            else:
+                speaker_id = tts_model.speaker_manager.name_to_id[speaker_name]
+                aux_input = {"speaker_ids": torch.tensor([speaker_id], dtype=torch.long, device=device)}
+            SPEAKER_CACHE[speaker_name] = aux_input
+    return aux_input
+
+def synthesize_sentence(sentence, speaker_name=None):
+    """Synthesize one sentence without autograd, autocasting to fp16 on CUDA.
+
+    Mirrors Synthesizer.tts for end-to-end models (trim, inter-sentence silence) but
+    calls tts_model.inference directly with the cached speaker tensors.
+    """
+    if synthesizer_vctk.vocoder_model is not None:
+        # Spectrogram models need the vocoder stage, so keep the stock path for them
+        with torch.inference_mode(), torch.autocast(device_type="cuda", dtype=torch.float16, enabled=USE_CUDA):
+            return np.asarray(synthesizer_vctk.tts(sentence, speaker_name=speaker_name), dtype=np.float32)
+
+    tts_model = synthesizer_vctk.tts_model
+    device = next(tts_model.parameters()).device
+    aux_input = dict(get_speaker_aux(speaker_name)) if speaker_name else {}
+
+    if use_onnx:
+        # Vits.inference_onnx always feeds sid=None, so run the session directly; the
+        # multi-speaker export takes the speaker index as a required "sid" input
+        token_ids = np.asarray([tts_model.tokenizer.text_to_ids(sentence)], dtype=np.int64)
+        inputs = {
+            "input": token_ids,
+            "input_lengths": np.array([token_ids.shape[1]], dtype=np.int64),
+            "scales": np.array(
+                [tts_model.inference_noise_scale, tts_model.length_scale, tts_model.inference_noise_scale_dp],
+                dtype=np.float32,
+            ),
+        }
+        speaker_ids = aux_input.get("speaker_ids")
+        if speaker_ids is not None:
+            inputs["sid"] = np.array([speaker_ids.item()], dtype=np.int64)
+        waveform = tts_model.onnx_sess.run(["output"], inputs)[0][0]
+        return finish_waveform(np.asarray(waveform, dtype=np.float32).squeeze())
+
+    with torch.inference_mode(), torch.autocast(device_type="cuda", dtype=torch.float16, enabled=USE_CUDA):
+        token_ids = torch.tensor(tts_model.tokenizer.text_to_ids(sentence), dtype=torch.long, device=device).unsqueeze(0)
+        aux_input["x_lengths"] = torch.tensor([token_ids.shape[1]], dtype=torch.long, device=device)
+        outputs = tts_model.inference(token_ids, aux_input=aux_input)
+    # Back to fp32 on the host before trimming and PCM conversion
+    return finish_waveform(outputs["model_outputs"].squeeze().float().cpu().numpy())
+
+def finish_waveform(waveform):
+    """Trim a sentence's waveform like Synthesizer.tts and append the inter-sentence silence."""
+    if synthesizer_vctk.tts_config.audio.get("do_trim_silence", False):
+        waveform = trim_silence(waveform, synthesizer_vctk.tts_model.ap)
+    return np.concatenate([waveform, np.zeros(10000, dtype=np.float32)])
+
+def synthesize(text, speaker_name=None):
+    """Synthesize a whole text sentence by sentence and return the joined waveform."""
+    wavs = [synthesize_sentence(sentence, speaker_name) for sentence in synthesizer_vctk.split_into_sentences(text)]
+    return np.concatenate(wavs) if wavs else np.zeros(0, dtype=np.float32)
+
+async def run_synthesis(func, *args, **kwargs):
+    """Run a synthesis call on the synthesis executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EXECUTOR, lambda: func(*args, **kwargs))
+
+def synthesize_batch(sentences, speaker_name=None):
+    """Synthesize several sentences for one speaker in a single padded forward pass."""
+    if len(sentences) == 1 or use_onnx or synthesizer_vctk.vocoder_model is not None:
+        return [synthesize_sentence(sentence, speaker_name) for sentence in sentences]
+
+    tts_model = synthesizer_vctk.tts_model
+    device = next(tts_model.parameters()).device
+    token_ids = [tts_model.tokenizer.text_to_ids(sentence) for sentence in sentences]
+    x_lengths = torch.tensor([len(ids) for ids in token_ids], dtype=torch.long, device=device)
+    x = torch.zeros(len(token_ids), int(x_lengths.max()), dtype=torch.long, device=device)
+    for i, ids in enumerate(token_ids):
+        x[i, :len(ids)] = torch.tensor(ids, dtype=torch.long, device=device)
+    aux_input = {}
+    if speaker_name:
+        # Broadcast the cached single-speaker tensors across the batch
+        aux_input = {key: value.expand(len(sentences), *value.shape[1:]) for key, value in get_speaker_aux(speaker_name).items()}
+    aux_input["x_lengths"] = x_lengths
+
+    with torch.inference_mode(), torch.autocast(device_type="cuda", dtype=torch.float16, enabled=USE_CUDA):
+        outputs = tts_model.inference(x, aux_input=aux_input)
+    # y_mask marks each item's valid frames; the decoder emits hop_length samples per frame
+    hop_length = synthesizer_vctk.tts_config.audio.hop_length
+    num_samples = (outputs["y_mask"].sum(dim=(1, 2)) * hop_length).long().tolist()
+    waveforms = outputs["model_outputs"].squeeze(1).float().cpu().numpy()
+    return [finish_waveform(waveforms[i, :n]) for i, n in enumerate(num_samples)]
+
+# Concurrent sentence requests are coalesced into batches of up to MAX_BATCH
+MAX_BATCH = 4
+
+class BatchCoalescer:
+    """Collects concurrent sentence syntheses and runs them as per-speaker batches.
+
+    Never waits for a batch to fill: whatever is queued when the executor frees up is
+    dispatched at once, so a lone request pays no extra latency and sentences that
+    arrive during a forward pass are batched into the next one.
+    """
+
+    def __init__(self, max_batch=MAX_BATCH, max_pending=MAX_PENDING_SYNTHESIS):
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._max_batch = max_batch
+        self._task = None
+
+    async def submit(self, sentence, speaker_name=None, wait=True):
+        """Synthesize a sentence through the next batch.
+
+        With wait=False a full queue raises a 503 instead of waiting for room, for
+        callers that can still send an error response.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        if wait:
+            await self._queue.put((sentence, speaker_name, future))
+        else:
+            try:
+                self._queue.put_nowait((sentence, speaker_name, future))
+            except asyncio.QueueFull:
+                raise HTTPException(status_code=503, detail="TTS server is busy, please retry shortly.")
+        return await future
+
+    async def _collect(self):
+        items = [await self._queue.get()]
+        while len(items) < self._max_batch and not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def _run(self):
+        while True:
+            groups = {}
+            for sentence, speaker_name, future in await self._collect():
+                # Skip requests whose client has already gone away
+                if not future.cancelled():
+                    groups.setdefault(speaker_name, []).append((sentence, future))
+            for speaker_name, group in groups.items():
+                try:
+                    wavs = await run_synthesis(synthesize_batch, [sentence for sentence, _ in group], speaker_name)
+                except Exception as e:
+                    for _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, future), waveform in zip(group, wavs):
+                    if not future.done():
+                        future.set_result(waveform)
+
+COALESCER = BatchCoalescer()
+STREAM_SLOTS = asyncio.Semaphore(MAX_ACTIVE_STREAMS)
+# Sentences each stream keeps queued in the coalescer, so a full set of active streams
+# can never fill it and a newly admitted request always finds room for its first sentence
+STREAM_IN_FLIGHT = max(1, min(MAX_BATCH, MAX_PENDING_SYNTHESIS // MAX_ACTIVE_STREAMS))
+
+# 64KB of int16 PCM per streamed chunk
+WAV_CHUNK_SAMPLES = 32 * 1024
+# Sentences synthesized ahead of the client before the producer waits
+STREAM_QUEUE_SIZE = 2
+
+# Encoded WAVs for repeated short texts (intros, outros, sponsor reads), keyed by speaker + text
+# Bounded by total WAV bytes per worker, not entry count - a long text is several MB of PCM
+AUDIO_CACHE_MAX_BYTES = int(os.environ.get("TTS_AUDIO_CACHE_BYTES", 64 * 1024 * 1024))
+AUDIO_CACHE = LRUCache(maxsize=AUDIO_CACHE_MAX_BYTES, getsizeof=len)
+AUDIO_CACHE_MAX_TEXT = 1000
+AUDIO_CACHE_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
+def audio_cache_key(speaker_name, text):
+    return hashlib.blake2b(f"{speaker_name}\x00{text}".encode(), digest_size=16).digest()
+
+def wav_header(sample_rate, num_samples=None):
+    """Build a 44-byte mono PCM16 RIFF header; an unknown length is written as 0xFFFFFFFF."""
+    data_size = 0xFFFFFFFF if num_samples is None else num_samples * 2
+    riff_size = 0xFFFFFFFF if num_samples is None else 36 + data_size
+    return (
+        b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+        + b"data" + struct.pack("<I", data_size)
     )
-    logger.info("VCTK model loaded successfully.")
-except Exception as e:
-    logger.error(f"Failed to initialize VCTK model: {str(e)}")
-    logger.error(traceback.format_exc())
-    # Don't raise here - let the server start with just Bark if available
-
-# Bark model initialization disabled for now - will be fixed separately
-logger.info("Bark model initialization disabled - focusing on VCTK for podcast")
-synthesizer_bark = None
 
-# Hugging Face Bark setup
-try:
-    bark_pipeline = pipeline("text-to-speech", "suno/bark")
-except Exception as e:
-    logging.error(f"Failed to initialize Hugging Face Bark pipeline: {e}")
-    bark_pipeline = None
+def f32_to_s16(x, out=None, scratch=None):
+    """Convert float samples to int16 PCM with in-place ufuncs and no temporaries.
+
+    The scale/clip/round steps run in scratch (float32, shaped like x); without one,
+    x itself is used as scratch and is overwritten.
+    """
+    if out is None:
+        out = np.empty(x.shape, dtype=np.int16)
+    if scratch is None:
+        scratch = x
+    np.multiply(x, 32767.0, out=scratch, casting='unsafe')
+    np.clip(scratch, -32768, 32767, out=scratch)
+    np.rint(scratch, out=scratch)
+    out[...] = scratch
+    return out
+
+def write_wav_fast(buf, rate, audio_f32):
+    """Write float samples to buf as a complete mono PCM16 WAV file."""
+    # Bark's output array isn't reused, so it can serve as the conversion scratch
+    pcm = f32_to_s16(np.ravel(np.asarray(audio_f32, dtype=np.float32)))
+    buf.write(wav_header(rate, pcm.size) + pcm.tobytes())
+
+class WavBufPool:
+    """Reusable numpy buffers for PCM conversion, keyed by dtype and power-of-two size."""
+
+    def __init__(self, max_per_size=8):
+        self._free = {}
+        self._lock = threading.Lock()
+        self._max_per_size = max_per_size
+
+    def acquire(self, n, dtype=np.int16):
+        size = 1 << max(0, n - 1).bit_length()
+        key = (np.dtype(dtype), size)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                return free.pop()
+        return np.empty(size, dtype=dtype)
+
+    def release(self, arr):
+        key = (arr.dtype, arr.size)
+        with self._lock:
+            free = self._free.setdefault(key, collections.deque())
+            if len(free) < self._max_per_size:
+                free.append(arr)
+
+POOL = WavBufPool()
+
+def pcm16_chunks(wavs, scratch, pcm):
+    """Convert float samples to int16 PCM bytes in WAV_CHUNK_SAMPLES slices.
+
+    scratch (float32) and pcm (int16) are reused for every slice, so only the
+    bytes handed to the response are allocated.
+    """
+    for start in range(0, wavs.size, WAV_CHUNK_SAMPLES):
+        n = min(WAV_CHUNK_SAMPLES, wavs.size - start)
+        yield f32_to_s16(wavs[start:start + n], out=pcm[:n], scratch=scratch[:n]).tobytes()
+
+async def wav_stream(first_wavs, sentences, speaker_name, sample_rate, cache_key=None, release=None):
+    """Stream a WAV whose remaining sentences are synthesized while earlier ones are sent.
+
+    With a cache_key, the finished file is stored in AUDIO_CACHE once the last chunk is out.
+    release is called once the stream has ended, however it ended.
+    """
+    pending = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+
+    async def produce():
+        try:
+            # Submit a few sentences together so a long render batches with itself
+            for start in range(0, len(sentences), STREAM_IN_FLIGHT):
+                window = sentences[start:start + STREAM_IN_FLIGHT]
+                for wavs in await asyncio.gather(*(COALESCER.submit(sentence, speaker_name) for sentence in window)):
+                    await pending.put(wavs)
+        finally:
+            await pending.put(None)
+
+    producer = asyncio.create_task(produce())
+    scratch = POOL.acquire(WAV_CHUNK_SAMPLES, np.float32)
+    pcm = POOL.acquire(WAV_CHUNK_SAMPLES, np.int16)
+    try:
+        # Total length isn't known until the last sentence is done
+        yield wav_header(sample_rate)
+        wavs = first_wavs
+        cached_chunks = [] if cache_key is not None else None
+        while wavs is not None:
+            for chunk in pcm16_chunks(wavs, scratch, pcm):
+                if cached_chunks is not None:
+                    cached_chunks.append(chunk)
+                yield chunk
+            wavs = await pending.get()
+        # Re-raise anything the producer hit so the stream is cut short rather than truncated silently
+        await producer
+        if cached_chunks is not None:
+            pcm_bytes = b"".join(cached_chunks)
+            wav_bytes = wav_header(sample_rate, len(pcm_bytes) // 2) + pcm_bytes
+            # LRUCache rejects a single value larger than its whole budget
+            if len(wav_bytes) <= AUDIO_CACHE_MAX_BYTES:
+                AUDIO_CACHE[cache_key] = wav_bytes
+    finally:
+        producer.cancel()
+        POOL.release(scratch)
+        POOL.release(pcm)
+        if release is not None:
+            release()
+
+async def prepend_chunk(first, rest):
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+# Longest text accepted by /api/tts, to keep oversized inputs away from the model
+MAX_CHARS = int(os.environ.get("TTS_MAX_CHARS", 5000))
 
 class TTSRequest(BaseModel):
+    model_config = ConfigDict(extra='ignore', str_strip_whitespace=True, frozen=True)
+
     text: str
     speaker_id: Optional[str] = None
     language_id: Optional[str] = None
 
+    @field_validator('text')
+    @classmethod
+    def check_text_length(cls, v):
+        if len(v) > MAX_CHARS:
+            raise ValueError(f"text must be at most {MAX_CHARS} characters")
+        return v
+
 class BarkTTSRequest(BaseModel):
     text: str
 
+# Number of throwaway syntheses run at startup
+WARMUP_RUNS = 3
+
+async def warm_up_model():
+    # Pays torch.compile, cuDNN autotuning and allocator growth before the first real request.
+    # Runs on the synthesis executor so compiled graphs are built on the thread that serves requests.
+    if synthesizer_vctk is None:
+        return
+    try:
+        logger.info("Warming up VCTK model...")
+        for _ in range(WARMUP_RUNS):
+            await run_synthesis(synthesize, "This is a warm up.", speaker_name=DEFAULT_SPEAKER)
+        # Also compile the padded multi-sentence path used by the batch coalescer
+        warmup_batch = ["This is a warm up.", "Warming up.", "One more warm up sentence.", "Done."][:MAX_BATCH]
+        await run_synthesis(synthesize_batch, warmup_batch, DEFAULT_SPEAKER)
+        logger.info("VCTK model warm-up complete.")
+    except Exception as e:
+        logger.error(f"VCTK model warm-up failed: {str(e)}")
+        logger.error(traceback.format_exc())
+
+@app.on_event("startup")
+async def load_models():
+    start_log_listener()
+    load_vctk_model()
+    await warm_up_model()
+
+@app.on_event("shutdown")
+def stop_log_listener():
+    # Flushes any queued records before the worker exits
+    if log_listener is not None:
+        log_listener.stop()
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     error_id = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -92,7 +630,7 @@ async def global_exception_handler(request: Request, exc: Exception):
         "traceback": traceback.format_exc()
     }
     logger.error(f"Error ID {error_id}: {error_details}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=error_details
     )
@@ -100,89 +638,121 @@ async def global_exception_handler(request: Request, exc: Exception):
 @app.post("/api/tts")
 @app.get("/api/tts")
 async def text_to_speech(request: Request, tts_request: Optional[TTSRequest] = None):
-    try:
-        # Check if VCTK model is available
-        if synthesizer_vctk is None:
-            raise HTTPException(
-                status_code=503, 
-                detail="VCTK TTS model is not available. Please check server logs for initialization errors."
-            )
-            
-        # Log request details
-        logger.info(f"Received request: {request.method} {request.url}")
+    # Check if VCTK model is available
+    if synthesizer_vctk is None:
+        raise HTTPException(
+            status_code=503, 
+            detail="VCTK TTS model is not available. Please check server logs for initialization errors."
+        )
         
-        # Handle both GET and POST requests
-        if tts_request is None:
-            # For GET requests, get parameters from query
-            text = request.query_params.get("text", "")
-            speaker_id = request.query_params.get("speaker_id", None)
-            language_id = request.query_params.get("language_id", None)
-        else:
-            # For POST requests, use the request body
-            text = tts_request.text
-            speaker_id = tts_request.speaker_id
-            language_id = tts_request.language_id
+    # Log request details
+    logger.info("Received request: %s %s", request.method, request.url)
+    
+    # Handle both GET and POST requests
+    if tts_request is None:
+        # For GET requests, validate the query parameters with the same model as POST bodies
+        try:
+            tts_request = TTSRequest(
+                text=request.query_params.get("text", ""),
+                speaker_id=request.query_params.get("speaker_id", None),
+                language_id=request.query_params.get("language_id", None)
+            )
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+    text = tts_request.text
+    speaker_id = tts_request.speaker_id
+    language_id = tts_request.language_id
 
-        logger.info(f"Processing text: {text[:100]}...")  # Log first 100 chars of text
+    logger.info("Processing text: %s...", text[:100])  # Log first 100 chars of text
 
-        if not text:
-            logger.warning("Empty text parameter received")
-            raise HTTPException(status_code=400, detail="Text parameter is required")
+    if not text:
+        logger.warning("Empty text parameter received")
+        raise HTTPException(status_code=400, detail="Text parameter is required")
 
-        # FIXED SPEECH GENERATION
-        synthesis_params = {}
-        
-        # Backwards compatibility: if no speaker_id is provided, use a default
-        speaker_manager = getattr(getattr(synthesizer_vctk, 'tts_model', None), 'speaker_manager', None)
-        
-        if not speaker_id:
-            # Use the first available speaker as default
-            if speaker_manager and hasattr(speaker_manager, 'name_to_id') and speaker_manager.name_to_id:
-                # Get the first available speaker ID from the name_to_id mapping
-                default_speaker_id = list(speaker_manager.name_to_id.keys())[0]
-                logger.info(f"No speaker_id provided, using default speaker: {default_speaker_id}")
-                synthesis_params['speaker_name'] = default_speaker_id
-            else:
-                logger.info("No speaker_id provided and no speaker manager available, proceeding without speaker selection")
-        elif speaker_manager and hasattr(speaker_manager, 'name_to_id'):
-            # Verify speaker exists in the name_to_id mapping
-            clean_speaker_id = speaker_id.strip()
-            if clean_speaker_id not in speaker_manager.name_to_id:
-                available_speakers = list(speaker_manager.name_to_id.keys())[:5]
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid speaker_id. Valid options: {available_speakers}..."
-                )
-            synthesis_params['speaker_name'] = clean_speaker_id
-        
-        wavs = synthesizer_vctk.tts(text, **synthesis_params)
-        
-        # Convert to bytes
-        logger.info("Converting to audio bytes...")
-        out = io.BytesIO()
-        synthesizer_vctk.save_wav(wavs, out)
-        out.seek(0)
-        
-        logger.info("Successfully generated audio")
-        # Return audio file
-        return StreamingResponse(
-            out,
+    # FIXED SPEECH GENERATION
+    synthesis_params = {}
+    
+    # Backwards compatibility: if no speaker_id is provided, use a default
+    if not speaker_id:
+        # Use the first available speaker as default
+        if DEFAULT_SPEAKER:
+            logger.info("No speaker_id provided, using default speaker: %s", DEFAULT_SPEAKER)
+            synthesis_params['speaker_name'] = DEFAULT_SPEAKER
+        else:
+            logger.info("No speaker_id provided and no speaker manager available, proceeding without speaker selection")
+    elif SPEAKER_IDS:
+        # Verify speaker exists in the model's speaker set
+        clean_speaker_id = speaker_id.strip()
+        if clean_speaker_id not in SPEAKER_SET:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid speaker_id. Valid options: {list(SPEAKER_IDS[:5])}..."
+            )
+        synthesis_params['speaker_name'] = clean_speaker_id
+    
+    speaker_name = synthesis_params.get('speaker_name')
+
+    cache_key = audio_cache_key(speaker_name, text) if len(text) < AUDIO_CACHE_MAX_TEXT else None
+    cached_wav = AUDIO_CACHE.get(cache_key) if cache_key is not None else None
+    if cached_wav is not None:
+        etag = f'"{cache_key.hex()}"'
+        headers = {"ETag": etag, **AUDIO_CACHE_HEADERS}
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers=headers)
+        logger.info("Serving cached audio")
+        return Response(
+            cached_wav,
             media_type="audio/wav",
-            headers={
-                "Content-Disposition": "attachment; filename=tts_output.wav"
-            }
+            headers={"Content-Disposition": "attachment; filename=tts_output.wav", **headers}
         )
-    except Exception as e:
-        logger.error(f"Error in text_to_speech: {str(e)}")
-        logger.error(traceback.format_exc())
+
+    # Synthesize the first sentence up front so failures still surface as an error
+    # response, then pipeline the rest behind the audio already being streamed
+    sentences = synthesizer_vctk.split_into_sentences(text)
+    if not sentences:
+        raise HTTPException(status_code=400, detail="Text parameter is required")
+    if STREAM_SLOTS.locked():
+        raise HTTPException(status_code=503, detail="TTS server is busy, please retry shortly.")
+    await STREAM_SLOTS.acquire()
+    try:
+        first_wavs = await COALESCER.submit(sentences[0], speaker_name, wait=False)
+    except BaseException:
+        STREAM_SLOTS.release()
         raise
+    stream = wav_stream(
+        first_wavs, sentences[1:], speaker_name, synthesizer_vctk.output_sample_rate, cache_key,
+        release=STREAM_SLOTS.release
+    )
+    # Start the stream here so its cleanup (and the slot release) runs even if the
+    # client disconnects before the response body is read
+    header = await stream.__anext__()
+    
+    logger.info("Streaming generated audio")
+    return StreamingResponse(
+        prepend_chunk(header, stream),
+        media_type="audio/wav",
+        headers={
+            "Content-Disposition": "attachment; filename=tts_output.wav",
+            **AUDIO_CACHE_HEADERS
+        }
+    )
 
 @app.get("/health")
 async def health_check():
+    if synthesizer_vctk is None:
+        return ORJSONResponse(
+            status_code=500,
+            content={
+                "status": "unhealthy",
+                "error": "VCTK TTS model is not loaded",
+                "timestamp": datetime.now().isoformat(),
+                "model_loaded": False
+            }
+        )
     try:
         # Test TTS functionality with a simple string
         test_text = "Health check"
-        wavs = synthesizer_vctk.tts(test_text, speaker_name="p225")
+        wavs = await run_synthesis(synthesize, test_text, speaker_name=DEFAULT_SPEAKER)
         return {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
@@ -190,7 +760,7 @@ async def health_check():
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={
                 "status": "unhealthy",
@@ -202,10 +772,9 @@ async def health_check():
 @app.get("/api/speakers")
 async def list_speakers():
     try:
-        speaker_manager = getattr(getattr(synthesizer_vctk, 'tts_model', None), 'speaker_manager', None)
-        if speaker_manager and hasattr(speaker_manager, 'name_to_id'):
+        if SPEAKER_IDS:
             return {
-                "speakers": list(speaker_manager.name_to_id.keys())
+                "speakers": SPEAKER_IDS
             }
         return {"speakers": [], "message": "Current model doesn't support multiple speakers"}
     except Exception as e:
@@ -215,13 +784,10 @@ async def list_speakers():
 @app.post("/api/tts/bark")
 async def bark_text_to_speech(bark_request: BarkTTSRequest):
     try:
-        if bark_pipeline is None:
+        loop = asyncio.get_running_loop()
+        wav_bytes = await loop.run_in_executor(BARK_EXECUTOR, bark_to_wav, bark_request.text)
+        if wav_bytes is None:
             raise HTTPException(status_code=500, detail="Bark model not available.")
-        text = bark_request.text
-        speech = bark_pipeline(text, forward_params={"do_sample": True})
-        wav_bytes = io.BytesIO()
-        scipy.io.wavfile.write(wav_bytes, rate=speech["sampling_rate"], data=speech["audio"])
-        wav_bytes.seek(0)
         return StreamingResponse(
             wav_bytes,
             media_type="audio/wav",
@@ -233,4 +799,15 @@ async def bark_text_to_speech(bark_request: BarkTTSRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=5002) 
\ No newline at end of file
+    # Thin launcher: models load in each worker's startup hook, so this process holds none.
+    # Size TTS_WORKERS to available RAM/VRAM.
+    uvicorn.run(
+        "tts_api_server:app",
+        host="0.0.0.0",
+        port=5002,
+        loop="uvloop",
+        http="httptools",
+        workers=WORKERS,
+        limit_concurrency=64,
+        timeout_keep_alive=30
+    ) 
\ No newline at end of file